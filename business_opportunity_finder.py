@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from typing import List, Dict
+from typing import List, Dict, Optional
 import sys
 
 from database import Database
@@ -26,6 +26,16 @@ STOCH_D = 3
 LOOKBACK_SUPPORT = 20
 MIN_DB_ROWS = 60
 
+# Indicator columns persisted per bar, keyed by the parameters they were
+# computed with so that changing a period never mixes stale values.
+INDICATOR_PARAMS = {
+    "RSI": f"length={RSI_PERIOD}",
+    "STOCHk": f"k={STOCH_K},d={STOCH_D}",
+    "STOCHd": f"k={STOCH_K},d={STOCH_D}",
+    "support": f"lookback={LOOKBACK_SUPPORT}",
+    "resistance": f"lookback={LOOKBACK_SUPPORT}",
+}
+
 
 class DataUnavailableError(Exception):
     """Raised when no data could be retrieved for a ticker."""
@@ -109,11 +119,101 @@ def _add_indicators(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def _support_resistance(df: pd.DataFrame, lookback: int = LOOKBACK_SUPPORT) -> Dict[str, float]:
-    recent = df.tail(lookback)
-    support = float(recent["Low"].min())
-    resistance = float(recent["High"].max())
-    return {"support": support, "resistance": resistance}
+def _add_levels(df: pd.DataFrame, lookback: int = LOOKBACK_SUPPORT) -> pd.DataFrame:
+    """Add support and resistance over the trailing ``lookback`` bars."""
+    df = df.copy()
+    df["support"] = df["Low"].rolling(window=lookback, min_periods=1).min()
+    df["resistance"] = df["High"].rolling(window=lookback, min_periods=1).max()
+    return df
+
+
+def _update_indicators(db: Database, ticker: str, df: pd.DataFrame) -> None:
+    """Persist indicators for new bars of ``ticker``.
+
+    The last stored bar is written again as well, since it may have been
+    stored while it was still an incomplete (intraday) bar.
+    """
+    if df.empty:
+        return
+    stored = [
+        db.latest_indicator_datetime(ticker, name, params)
+        for name, params in INDICATOR_PARAMS.items()
+    ]
+    watermark = None if None in stored else pd.Timestamp(min(stored))
+
+    df = _add_levels(_add_indicators(df))
+    if watermark is not None:
+        df = df[df.index >= watermark]
+    db.insert_indicators(ticker, df, INDICATOR_PARAMS)
+
+
+def _validate_mode(mode: str) -> str:
+    mode = mode.lower()
+    if mode not in {"overbought", "oversold", "both"}:
+        raise ValueError("mode must be 'overbought', 'oversold', or 'both'")
+    return mode
+
+
+def _classify(rsi_val: float, stoch_k: float, stoch_d: float) -> Optional[str]:
+    if rsi_val >= 70 and stoch_k >= 80 and stoch_d >= 80:
+        return "overbought"
+    if rsi_val <= 30 and stoch_k <= 20 and stoch_d <= 20:
+        return "oversold"
+    return None
+
+
+def _query_snapshot(
+    db: Database,
+    tickers: List[str],
+    mode: str,
+    min_volume: int,
+    min_price: float,
+    max_price: float,
+) -> List[Dict[str, object]]:
+    """Build results from the latest stored indicator values."""
+    by_symbol = {t["ticker"]: t for t in tickers}
+    snapshot = db.fetch_indicator_snapshot(
+        INDICATOR_PARAMS,
+        latest="RSI",
+        tickers=list(by_symbol),
+        min_volume=min_volume,
+        min_price=min_price,
+        max_price=max_price,
+    )
+    rows = {row["ticker"]: row for row in snapshot.to_dict("records")}
+
+    results: List[Dict[str, object]] = []
+    for symbol, ticker in by_symbol.items():
+        row = rows.get(symbol)
+        if row is None:
+            continue
+        try:
+            rsi_val = float(row["RSI"])
+            stoch_k = float(row["STOCHk"])
+            stoch_d = float(row["STOCHd"])
+        except (TypeError, ValueError):
+            # Skip this ticker if indicators could not be calculated
+            continue
+
+        status = _classify(rsi_val, stoch_k, stoch_d)
+        if status is None:
+            continue
+        if mode != "both" and status != mode:
+            continue
+
+        results.append(
+            {
+                "ticker": ticker,
+                "price": float(row["close"]),
+                "rsi": rsi_val,
+                "stoch_k": stoch_k,
+                "stoch_d": stoch_d,
+                "status": status,
+                "support": float(row["support"]),
+                "resistance": float(row["resistance"]),
+            }
+        )
+    return results
 
 
 # Public API
@@ -149,74 +249,44 @@ def find_opportunities(
         Each dict contains ticker, RSI, STOCHk, STOCHd, status, support, and
         resistance.
     """
-    mode = mode.lower()
-    if mode not in {"overbought", "oversold", "both"}:
-        raise ValueError("mode must be 'overbought', 'oversold', or 'both'")
+    mode = _validate_mode(mode)
 
     db = Database()
-    results: List[Dict[str, object]] = []
-
-    total = len(tickers)
-    for idx, ticker in enumerate(tickers, start=1):
-        if show_progress:
-            _display_progress(idx, total)
+    try:
+        total = len(tickers)
+        for idx, ticker in enumerate(tickers, start=1):
+            if show_progress:
+                _display_progress(idx, total)
 
+            df = _get_data(db, ticker)
+            _update_indicators(db, ticker["ticker"], df)
 
-        df = _get_data(db, ticker)
-
-
-        df = _add_indicators(df)
-        last_row = df.iloc[-1]
-
-        try:
-            volume_val = float(last_row["Volume"])
-            price_val = float(last_row["Close"])
-        except (KeyError, TypeError, ValueError):
-            continue
+        return _query_snapshot(db, tickers, mode, min_volume, min_price, max_price)
+    finally:
+        db.close()
 
-        if volume_val < min_volume or price_val < min_price or price_val > max_price:
-            continue
-
-        indicators = last_row
-        try:
-            rsi_val = float(indicators["RSI"])
-            stoch_k = float(indicators["STOCHk"])
-            stoch_d = float(indicators["STOCHd"])
-        except (TypeError, ValueError):
-            # Skip this ticker if indicators could not be calculated
-            continue
-
-        overbought = rsi_val >= 70 and stoch_k >= 80 and stoch_d >= 80
-        oversold = rsi_val <= 30 and stoch_k <= 20 and stoch_d <= 20
-
-        status = None
-        if overbought:
-            status = "overbought"
-        elif oversold:
-            status = "oversold"
-
-        if status is None:
-            continue
-        if mode != "both" and status != mode:
-            continue
 
-        levels = _support_resistance(df)
+def query_opportunities(
+    tickers: List[str],
+    mode: str = "both",
+    min_volume: int = 0,
+    min_price: float = 0.0,
+    max_price: float = float("inf"),
+) -> List[Dict[str, object]]:
+    """Filter tickers using only the indicators already stored in the database.
 
-        results.append(
-            {
-                "ticker": ticker,
-                "price": price_val,
-                "rsi": rsi_val,
-                "stoch_k": stoch_k,
-                "stoch_d": stoch_d,
-                "status": status,
-                "support": levels["support"],
-                "resistance": levels["resistance"],
-            }
-        )
+    Unlike :func:`find_opportunities` no data is downloaded and nothing is
+    recomputed, so re-filtering with different thresholds is a single query.
+    Parameters and return value are the same as for
+    :func:`find_opportunities`.
+    """
+    mode = _validate_mode(mode)
 
-    db.close()
-    return results
+    db = Database()
+    try:
+        return _query_snapshot(db, tickers, mode, min_volume, min_price, max_price)
+    finally:
+        db.close()
 
 
 if __name__ == '__main__':
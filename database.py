@@ -1,8 +1,14 @@
 import sqlite3
 from pathlib import Path
+from typing import Dict, Iterable, Optional
 import pandas as pd
 
 
+def _format_datetime(value) -> str:
+    """Format a bar time the way it is stored in every table."""
+    return pd.Timestamp(value).isoformat(sep=" ")
+
+
 class Database:
     """Simple SQLite wrapper for storing market data."""
 
@@ -27,16 +33,134 @@ class Database:
             )
             """
         )
+        cur.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_prices_ticker_datetime
+            ON prices (ticker, datetime)
+            """
+        )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS indicators (
+                ticker TEXT NOT NULL,
+                indicator TEXT NOT NULL,
+                params TEXT NOT NULL,
+                datetime TEXT NOT NULL,
+                value REAL,
+                PRIMARY KEY (ticker, indicator, params, datetime)
+            )
+            """
+        )
+        cur.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_indicators_latest
+            ON indicators (indicator, params, ticker, datetime)
+            """
+        )
         self.conn.commit()
 
     def insert_dataframe(self, df: pd.DataFrame):
-        df = df[["Ticker", "Date", "Open", "High", "Low", "Close", "Volume"]]
+        df = df[["Ticker", "Date", "Open", "High", "Low", "Close", "Volume"]].copy()
         df.columns = ["ticker", "datetime", "open", "high", "low", "close", "volume"]
+        df["datetime"] = df["datetime"].map(_format_datetime)
         df.to_sql("prices", self.conn, if_exists="append", index=False)
 
     def fetch_ticker(self, ticker: str) -> pd.DataFrame:
-        query = "SELECT * FROM prices WHERE ticker = ? ORDER BY datetime"
+        query = "SELECT * FROM prices WHERE ticker = ? ORDER BY datetime, id"
         return pd.read_sql_query(query, self.conn, params=(ticker,))
 
+    def insert_indicators(self, ticker: str, df: pd.DataFrame, params: Dict[str, str]):
+        """Store indicator columns of ``df`` (indexed by bar time) for ``ticker``.
+
+        ``params`` maps each column name to the parameter string it was
+        computed with. Existing values for the same key are replaced.
+        """
+        rows = []
+        for column, param in params.items():
+            for ts, value in df[column].items():
+                value = None if pd.isna(value) else float(value)
+                rows.append((ticker, column, param, _format_datetime(ts), value))
+        self.conn.executemany(
+            """
+            INSERT OR REPLACE INTO indicators (ticker, indicator, params, datetime, value)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            rows,
+        )
+        self.conn.commit()
+
+    def latest_indicator_datetime(self, ticker: str, indicator: str, params: str) -> Optional[str]:
+        """Return the most recent bar time stored for an indicator, if any."""
+        query = (
+            "SELECT MAX(datetime) FROM indicators "
+            "WHERE ticker = ? AND indicator = ? AND params = ?"
+        )
+        row = self.conn.execute(query, (ticker, indicator, params)).fetchone()
+        return row[0]
+
+    def fetch_indicator_snapshot(
+        self,
+        params: Dict[str, str],
+        latest: str,
+        tickers: Optional[Iterable[str]] = None,
+        min_volume: float = 0,
+        min_price: float = 0.0,
+        max_price: float = float("inf"),
+    ) -> pd.DataFrame:
+        """Return the latest stored indicator values per ticker.
+
+        ``params`` maps indicator names to parameter strings, as for
+        :meth:`insert_indicators`; the most recent bar stored for ``latest``
+        is the one returned. Close and volume of that bar are joined from
+        ``prices`` and filtered in the same query. Missing close or volume
+        values are not filtered out.
+        """
+        names = list(params)
+        columns = ["ticker", "datetime", "close", "volume"] + names
+        args = [latest, params[latest]]
+        select = ["s.ticker", "s.datetime", "p.close", "p.volume"]
+        joins = []
+        for idx, name in enumerate(names):
+            alias = f"i{idx}"
+            select.append(f"{alias}.value")
+            joins.append(
+                f"LEFT JOIN indicators AS {alias} ON {alias}.ticker = s.ticker "
+                f"AND {alias}.indicator = ? AND {alias}.params = ? "
+                f"AND {alias}.datetime = s.datetime"
+            )
+            args.extend([name, params[name]])
+
+        where = [
+            "(p.volume IS NULL OR p.volume >= ?)",
+            "(p.close IS NULL OR p.close >= ?)",
+            "(p.close IS NULL OR p.close <= ?)",
+        ]
+        args.extend([min_volume, min_price, max_price])
+        if tickers is not None:
+            tickers = list(tickers)
+            if not tickers:
+                return pd.DataFrame(columns=columns)
+            where.append(f"s.ticker IN ({', '.join('?' for _ in tickers)})")
+            args.extend(tickers)
+
+        query = f"""
+            SELECT {', '.join(select)}
+            FROM (
+                SELECT ticker, MAX(datetime) AS datetime FROM indicators
+                WHERE indicator = ? AND params = ?
+                GROUP BY ticker
+            ) AS s
+            {' '.join(joins)}
+            JOIN prices AS p ON p.id = (
+                SELECT id FROM prices
+                WHERE ticker = s.ticker AND datetime = s.datetime
+                ORDER BY id DESC LIMIT 1
+            )
+            WHERE {' AND '.join(where)}
+        """
+        df = pd.read_sql_query(query, self.conn, params=args)
+        df.columns = columns
+        return df.astype({name: float for name in columns[2:]})
+
     def close(self):
         self.conn.close()
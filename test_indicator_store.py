@@ -0,0 +1,184 @@
+"""Tests for the persisted indicator snapshot used by the opportunity finder."""
+
+import math
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pandas_ta")
+pytest.importorskip("yfinance")
+
+import business_opportunity_finder as bof
+from database import Database
+
+
+def _bars(closes, start="2024-01-01", volume=1_000_000):
+    dates = pd.date_range(start, periods=len(closes), freq="D", name="Date")
+    closes = pd.Series(closes, index=dates, dtype=float)
+    return pd.DataFrame(
+        {
+            "Open": closes,
+            "High": closes + 0.5,
+            "Low": closes - 0.5,
+            "Close": closes,
+            "Volume": float(volume),
+        }
+    )
+
+
+def _store_prices(db, ticker, df):
+    df = df.reset_index()
+    df["Ticker"] = ticker
+    db.insert_dataframe(df)
+
+
+def _stored(db, ticker, indicator):
+    query = (
+        "SELECT datetime, value FROM indicators "
+        "WHERE ticker = ? AND indicator = ? AND params = ? ORDER BY datetime"
+    )
+    rows = db.conn.execute(query, (ticker, indicator, bof.INDICATOR_PARAMS[indicator]))
+    return {pd.Timestamp(ts): value for ts, value in rows}
+
+
+def _expected(df, indicator):
+    return bof._add_levels(bof._add_indicators(df))[indicator].astype(float)
+
+
+def _baseline(tickers, frames, mode, min_volume, min_price, max_price):
+    """The in-memory filter ``find_opportunities`` used before persistence."""
+    results = []
+    for ticker in tickers:
+        df = bof._add_indicators(frames[ticker["ticker"]])
+        last_row = df.iloc[-1]
+        volume_val = float(last_row["Volume"])
+        price_val = float(last_row["Close"])
+        if volume_val < min_volume or price_val < min_price or price_val > max_price:
+            continue
+        rsi_val = float(last_row["RSI"])
+        stoch_k = float(last_row["STOCHk"])
+        stoch_d = float(last_row["STOCHd"])
+        status = bof._classify(rsi_val, stoch_k, stoch_d)
+        if status is None or (mode != "both" and status != mode):
+            continue
+        recent = df.tail(bof.LOOKBACK_SUPPORT)
+        results.append(
+            {
+                "ticker": ticker,
+                "price": price_val,
+                "rsi": rsi_val,
+                "stoch_k": stoch_k,
+                "stoch_d": stoch_d,
+                "status": status,
+                "support": float(recent["Low"].min()),
+                "resistance": float(recent["High"].max()),
+            }
+        )
+    return results
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = Database(str(tmp_path / "market.db"))
+    yield db
+    db.close()
+
+
+def test_first_insert_stores_every_bar(db):
+    df = _bars([100 + math.sin(i / 3) * 5 for i in range(40)])
+    _store_prices(db, "AAA", df)
+
+    bof._update_indicators(db, "AAA", df)
+
+    for indicator in bof.INDICATOR_PARAMS:
+        stored = _stored(db, "AAA", indicator)
+        assert list(stored) == list(df.index)
+        expected = _expected(df, indicator)
+        for ts, value in stored.items():
+            if pd.isna(expected[ts]):
+                assert value is None
+            else:
+                assert value == pytest.approx(expected[ts])
+
+
+def test_incremental_insert_writes_only_newer_bars(db, monkeypatch):
+    df = _bars([100 + math.sin(i / 3) * 5 for i in range(40)])
+    bof._update_indicators(db, "AAA", df.iloc[:30])
+
+    written = []
+    original = db.insert_indicators
+
+    def spy(ticker, frame, params):
+        written.append(list(frame.index))
+        original(ticker, frame, params)
+
+    monkeypatch.setattr(db, "insert_indicators", spy)
+    bof._update_indicators(db, "AAA", df)
+
+    # The previously latest bar is rewritten along with the ten new ones.
+    assert written == [list(df.index[29:])]
+    stored = _stored(db, "AAA", "RSI")
+    assert list(stored) == list(df.index)
+    assert stored[df.index[-1]] == pytest.approx(_expected(df, "RSI").iloc[-1])
+
+
+def test_repeated_bar_with_changed_close_is_recomputed(db):
+    closes = [100 + math.sin(i / 3) * 5 for i in range(40)]
+    intraday = _bars(closes)
+    _store_prices(db, "AAA", intraday)
+    bof._update_indicators(db, "AAA", intraday)
+
+    final = _bars(closes[:-1] + [closes[-1] + 8])
+    _store_prices(db, "AAA", final.tail(1))
+    bof._update_indicators(db, "AAA", final)
+
+    snapshot = db.fetch_indicator_snapshot(bof.INDICATOR_PARAMS, latest="RSI")
+    row = snapshot.iloc[0]
+    assert row["close"] == pytest.approx(final["Close"].iloc[-1])
+    for indicator in bof.INDICATOR_PARAMS:
+        assert row[indicator] == pytest.approx(_expected(final, indicator).iloc[-1])
+
+
+@pytest.mark.parametrize(
+    "mode, min_price, min_volume, max_price",
+    [
+        ("both", 0.0, 0, float("inf")),
+        ("overbought", 0.0, 0, float("inf")),
+        ("oversold", 0.0, 0, float("inf")),
+        ("both", 60.0, 0, float("inf")),
+        ("both", 0.0, 500_000, float("inf")),
+        ("both", 0.0, 0, 60.0),
+        ("oversold", 10.0, 2_000_000, 100.0),
+    ],
+)
+def test_query_matches_in_memory_filter(tmp_path, monkeypatch, mode, min_price, min_volume, max_price):
+    monkeypatch.chdir(tmp_path)
+    frames = {
+        "UP": _bars([50 + i for i in range(40)], volume=3_000_000),
+        "DOWN": _bars([90 - i for i in range(40)], volume=300_000),
+        "DIP": _bars([80 - i * 0.8 for i in range(40)], volume=2_500_000),
+        "FLAT": _bars([70 + math.sin(i) for i in range(40)]),
+    }
+    tickers = [{"ticker": symbol} for symbol in frames]
+
+    db = Database()
+    for symbol, df in frames.items():
+        _store_prices(db, symbol, df)
+        bof._update_indicators(db, symbol, df)
+    db.close()
+
+    results = bof.query_opportunities(
+        tickers, mode=mode, min_volume=min_volume, min_price=min_price, max_price=max_price
+    )
+    expected = _baseline(tickers, frames, mode, min_volume, min_price, max_price)
+
+    assert [r["ticker"] for r in results] == [r["ticker"] for r in expected]
+    for got, want in zip(results, expected):
+        assert got["status"] == want["status"]
+        for key in ("price", "rsi", "stoch_k", "stoch_d", "support", "resistance"):
+            assert got[key] == pytest.approx(want[key])
+
+
+def test_query_rejects_unknown_mode():
+    with pytest.raises(ValueError):
+        bof.query_opportunities([], mode="sideways")